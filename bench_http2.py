@@ -0,0 +1,153 @@
+"""
+HTTP/2 Fetch Benchmark
+Fetches a batch of thumbnail-sized images from local stand-in servers,
+once over HTTP/1.1 with requests and once multiplexed over HTTP/2, with
+simulated network round trips (needs httpx[http2] and the openssl CLI)
+"""
+
+import asyncio
+import http.server
+import os
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import h2.config
+import h2.connection
+import h2.events
+
+from image_utils import fetch_image
+from http2_transport import Http2Transport
+
+IMAGES = 100
+CONCURRENCY = 16
+# Simulated round trip; a new connection costs two (TCP + TLS) before its first response
+RTT = 0.05
+BODY = b'\xff\xd8\xff\xe0' + os.urandom(20 * 1024)
+
+
+def make_certificate(directory):
+    """Create a self-signed certificate for 127.0.0.1 and return (cert, key) paths"""
+    cert_path = os.path.join(directory, 'cert.pem')
+    key_path = os.path.join(directory, 'key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                    '-keyout', key_path, '-out', cert_path, '-subj', '/CN=127.0.0.1',
+                    '-addext', 'subjectAltName=IP:127.0.0.1'], check=True, capture_output=True)
+    return cert_path, key_path
+
+
+class Http1Handler(http.server.BaseHTTPRequestHandler):
+    """HTTP/1.1 keep-alive stand-in for an image CDN"""
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.ready_at = time.time() + 2 * RTT
+
+    def do_GET(self):
+        time.sleep(max(self.ready_at - time.time(), 0) + RTT)
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Http2Protocol(asyncio.Protocol):
+    """HTTP/2 stand-in for an image CDN, answering every stream concurrently"""
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.ready_at = time.time() + 2 * RTT
+        self.conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+        self.conn.initiate_connection()
+        self.transport.write(self.conn.data_to_send())
+
+    def data_received(self, data):
+        for event in self.conn.receive_data(data):
+            if isinstance(event, h2.events.RequestReceived):
+                asyncio.ensure_future(self.respond(event.stream_id))
+        self.transport.write(self.conn.data_to_send())
+
+    async def respond(self, stream_id):
+        await asyncio.sleep(max(self.ready_at - time.time(), 0) + RTT)
+        self.conn.send_headers(stream_id, [(':status', '200'), ('content-type', 'image/jpeg'),
+                                           ('content-length', str(len(BODY)))])
+        self.transport.write(self.conn.data_to_send())
+
+        # Send in frame-sized chunks, waiting whenever flow control closes the window
+        data = BODY
+        while data:
+            window = self.conn.local_flow_control_window(stream_id)
+            if window < 1:
+                await asyncio.sleep(0.001)
+                continue
+            chunk_size = min(window, len(data), self.conn.max_outbound_frame_size)
+            self.conn.send_data(stream_id, data[:chunk_size], end_stream=chunk_size == len(data))
+            self.transport.write(self.conn.data_to_send())
+            data = data[chunk_size:]
+
+
+def start_http1_server(cert_path, key_path):
+    """Start the HTTP/1.1 stand-in in a thread and return its port"""
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Http1Handler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1]
+
+
+def start_http2_server(cert_path, key_path):
+    """Start the HTTP/2 stand-in on its own event loop thread and return its port"""
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    context.set_alpn_protocols(['h2'])
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(loop.create_server(Http2Protocol, '127.0.0.1', 0, ssl=context))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return server.sockets[0].getsockname()[1]
+
+
+def run_batch(base_url, transport=None):
+    """Fetch IMAGES images with CONCURRENCY workers and return the elapsed seconds"""
+    urls = [f'{base_url}/thumb/{i}.jpg' for i in range(IMAGES)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+        for img_data, file_ext in executor.map(lambda url: fetch_image(url, transport=transport), urls):
+            assert file_ext == '.jpg' and len(img_data) == len(BODY)
+    return time.perf_counter() - started
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = make_certificate(directory)
+        # requests picks the CA bundle up from the environment
+        os.environ['REQUESTS_CA_BUNDLE'] = cert_path
+
+        http1_url = f'https://127.0.0.1:{start_http1_server(cert_path, key_path)}'
+        http2_url = f'https://127.0.0.1:{start_http2_server(cert_path, key_path)}'
+
+        print(f"⏱️  Fetching {IMAGES} thumbnails, {CONCURRENCY} at a time, simulated RTT {RTT * 1000:.0f} ms")
+        http1_time = run_batch(http1_url)
+        print(f"  HTTP/1.1 (requests):    {http1_time * 1000:.0f} ms")
+
+        transport = Http2Transport(5, 10, verify=ssl.create_default_context(cafile=cert_path))
+        try:
+            http2_time = run_batch(http2_url, transport)
+            protocols = transport.snapshot()
+        finally:
+            transport.close()
+        print(f"  HTTP/2 (multiplexed):   {http2_time * 1000:.0f} ms  {protocols}")
+        print("=" * 40)
+        print(f"Speed-up: {http1_time / http2_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
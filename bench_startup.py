@@ -0,0 +1,83 @@
+"""
+Cold Start Benchmark for server.py
+Starts the server in a fresh process and measures how long it takes to
+answer its first /ready and /download requests
+"""
+
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+RUNS = 5
+TIMEOUT = 30
+
+
+def free_port():
+    """Ask the OS for an unused TCP port"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def request(url, data=None):
+    """Send a request and return the status code, or None if the server is not up yet"""
+    body = json.dumps(data).encode() if data is not None else None
+    req = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError):
+        return None
+
+
+def measure_cold_start():
+    """Return (seconds to first /ready, seconds to first /download) for one cold start"""
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    env = dict(os.environ, PORT=str(port), BRAVE_API_KEY=os.getenv('BRAVE_API_KEY', 'benchmark-key'),
+               JOB_STORE=f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='udm_bench_'), 'jobs.db')}",
+               JOB_WORKERS='0')
+
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, 'server.py'], env=env, stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL, cwd=os.path.dirname(os.path.abspath(__file__)))
+    try:
+        while request(f'{base_url}/ready') is None:
+            if time.perf_counter() - started > TIMEOUT:
+                raise RuntimeError("Server did not start in time")
+            time.sleep(0.005)
+        ready_time = time.perf_counter() - started
+
+        request(f'{base_url}/download', {'query': 'benchmark', 'count': 1})
+        download_time = time.perf_counter() - started
+        return ready_time, download_time
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    print(f"⏱️  Measuring server.py cold start over {RUNS} runs...")
+    ready_times, download_times = [], []
+    for run in range(1, RUNS + 1):
+        ready_time, download_time = measure_cold_start()
+        ready_times.append(ready_time)
+        download_times.append(download_time)
+        print(f"  Run {run}: first /ready {ready_time * 1000:.0f} ms, first /download {download_time * 1000:.0f} ms")
+
+    print("=" * 40)
+    print(f"Median first /ready:    {statistics.median(ready_times) * 1000:.0f} ms")
+    print(f"Median first /download: {statistics.median(download_times) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Brave API Client
+Spreads Brave Search API calls over a pool of keys, pacing them to stay
+under each key's per-second and monthly limits
+"""
+
+import threading
+import time
+
+# Requests per second per key until Brave's headers tell us otherwise (free plan)
+DEFAULT_RATE_PER_SECOND = 1
+# Longest a search waits for a key to free up before giving up
+DEFAULT_MAX_WAIT = 30
+
+
+class QuotaExceeded(Exception):
+    """Raised when no API key can serve a request within the allowed wait"""
+
+
+def parse_rate_limit_headers(headers):
+    """Parse Brave's X-RateLimit-* headers into lists of [per-second, per-month] values"""
+    def values(name):
+        raw = headers.get(name) or ''
+        return [int(value.strip()) for value in raw.split(',') if value.strip().isdigit()]
+
+    return {
+        'limit': values('X-RateLimit-Limit'),
+        'remaining': values('X-RateLimit-Remaining'),
+        'reset': values('X-RateLimit-Reset')
+    }
+
+
+class ApiKeyState:
+    """Rate-limit bookkeeping for a single API key"""
+
+    def __init__(self, api_key, rate_per_second=DEFAULT_RATE_PER_SECOND):
+        self.api_key = api_key
+        self.rate_per_second = rate_per_second
+        self.last_request = 0
+        self.blocked_until = 0
+        self.requests = 0
+        self.throttled = 0
+        self.monthly_limit = None
+        self.monthly_remaining = None
+        self.monthly_reset_at = None
+
+    def has_monthly_quota(self, now):
+        """Check whether the key has monthly quota left (unknown counts as yes)"""
+        if self.monthly_remaining is None or self.monthly_remaining > 0:
+            return True
+        return self.monthly_reset_at is not None and self.monthly_reset_at <= now
+
+    def next_available(self):
+        """Earliest time this key may be used without exceeding its per-second limit"""
+        return max(self.last_request + 1.0 / self.rate_per_second, self.blocked_until)
+
+    def reserve(self, now):
+        """Record that a request is being sent with this key"""
+        self.last_request = now
+        self.requests += 1
+        if self.monthly_remaining:
+            self.monthly_remaining -= 1
+
+    def update(self, headers, throttled=False):
+        """Update limits from a response's rate-limit headers"""
+        now = time.time()
+        rate = parse_rate_limit_headers(headers)
+        limit, remaining, reset = rate['limit'], rate['remaining'], rate['reset']
+
+        if limit and limit[0] > 0:
+            self.rate_per_second = limit[0]
+        if len(limit) > 1:
+            self.monthly_limit = limit[1]
+        if len(remaining) > 1:
+            self.monthly_remaining = remaining[1]
+        if len(reset) > 1:
+            self.monthly_reset_at = now + reset[1]
+
+        if throttled:
+            self.throttled += 1
+            retry_after = headers.get('Retry-After', '')
+            if reset:
+                self.blocked_until = now + max(reset[0], 1)
+            elif retry_after.isdigit():
+                self.blocked_until = now + int(retry_after)
+            else:
+                self.blocked_until = now + 1
+        elif remaining and remaining[0] == 0 and reset:
+            self.blocked_until = now + reset[0]
+
+    def to_dict(self):
+        """Return the key's state as a JSON-friendly dict, with the key masked"""
+        return {
+            'key': f"...{self.api_key[-4:]}",
+            'rate_per_second': self.rate_per_second,
+            'requests': self.requests,
+            'throttled': self.throttled,
+            'monthly_limit': self.monthly_limit,
+            'monthly_remaining': self.monthly_remaining,
+            'blocked_for': round(max(self.blocked_until - time.time(), 0), 1)
+        }
+
+
+class BraveKeyPool:
+    """Pool of Brave API keys that paces and spreads requests between them"""
+
+    def __init__(self, api_keys, rate_per_second=DEFAULT_RATE_PER_SECOND, max_wait=DEFAULT_MAX_WAIT):
+        if isinstance(api_keys, str):
+            api_keys = [api_keys]
+        if not api_keys:
+            raise ValueError("At least one Brave API key is required")
+        self.keys = [ApiKeyState(api_key, rate_per_second) for api_key in api_keys]
+        self.max_wait = max_wait
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """Wait for the key that frees up first and reserve a request on it"""
+        deadline = time.time() + self.max_wait
+        with self.condition:
+            while True:
+                now = time.time()
+                usable = [key for key in self.keys if key.has_monthly_quota(now)]
+                if not usable:
+                    raise QuotaExceeded("Monthly quota exhausted for all Brave API keys")
+
+                key = min(usable, key=lambda key: key.next_available())
+                ready_at = key.next_available()
+                if ready_at <= now:
+                    key.reserve(now)
+                    return key
+                if ready_at > deadline:
+                    raise QuotaExceeded(f"Brave API rate limit: no key free within {self.max_wait}s")
+
+                self.condition.wait(ready_at - now)
+
+    def get(self, url, headers=None, params=None, timeout=15):
+        """Send a GET request with the next free key, retrying on another key after a 429"""
+        # Imported here as requests is slow to import and only needed once searches run
+        import requests
+
+        for _ in range(len(self.keys) + 1):
+            key = self.acquire()
+            request_headers = dict(headers or {}, **{'X-Subscription-Token': key.api_key})
+            response = requests.get(url, headers=request_headers, params=params, timeout=timeout)
+
+            with self.condition:
+                key.update(response.headers, throttled=response.status_code == 429)
+                self.condition.notify_all()
+
+            if response.status_code != 429:
+                return response
+
+        raise QuotaExceeded("Brave API kept rate limiting requests on every key")
+
+    def snapshot(self):
+        """Return per-key state and the total remaining monthly quota"""
+        with self.condition:
+            keys = [key.to_dict() for key in self.keys]
+        known = [key['monthly_remaining'] for key in keys if key['monthly_remaining'] is not None]
+        return {
+            'keys': keys,
+            'monthly_remaining': sum(known) if known else None,
+            'available_keys': sum(1 for key in keys if key['blocked_for'] == 0)
+        }
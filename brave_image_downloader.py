@@ -3,111 +3,167 @@ Brave Search Image Downloader
 Downloads images from Brave Search API to organized folders
 """
 
-import requests
 import os
+import re
+import sys
+import json
 import time
-from urllib.parse import urlparse
+import hashlib
+from image_utils import fetch_result_image
+from image_result import ImageResult, filter_by_size
+from brave_api import BraveKeyPool, QuotaExceeded
+
+# Per-folder record of already downloaded source URLs and content hashes
+SYNC_INDEX_NAME = '.sync_index.json'
 
 class BraveImageDownloader:
     def __init__(self, api_key):
-        self.api_key = api_key
+        # Accepts a single key, a list of keys or a ready-made BraveKeyPool
+        self.key_pool = api_key if isinstance(api_key, BraveKeyPool) else BraveKeyPool(api_key)
+        self.api_key = self.key_pool.keys[0].api_key
         self.base_url = "https://api.search.brave.com/res/v1/images/search"
         self.headers = {
-            "Accept": "application/json",
-            "X-Subscription-Token": api_key
+            "Accept": "application/json"
         }
         self.base_folder = os.path.join(os.getcwd(), "downloads")
         
-    def search_images(self, query, count=50, min_size=None):
-        """Search for images using Brave Search API and filter by minimum size"""
-        # Request more results to account for filtering
-        request_count = count * 3 if min_size else count
-        request_count = min(request_count, 150)  # API limit
-        
+    def search_raw(self, query, count=50):
+        """Search for images using Brave Search API and return the raw result dicts"""
         params = {
             "q": query,
-            "count": request_count,
+            "count": min(count, 150),  # API limit
             "safesearch": "off"
         }
         
         try:
             print(f"Searching for '{query}'...")
-            response = requests.get(self.base_url, headers=self.headers, params=params)
+            response = self.key_pool.get(self.base_url, headers=self.headers, params=params)
             
             if response.status_code != 200:
                 print(f"❌ API Error {response.status_code}: {response.text}")
                 return []
                 
-            data = response.json()
-            results = data.get('results', [])
-            
-            # Filter by size if minimum size is specified
-            if min_size:
-                min_width, min_height = min_size
-                filtered_results = []
-                
-                for img in results:
-                    if 'properties' in img and isinstance(img['properties'], dict):
-                        props = img['properties']
-                        width = props.get('width')
-                        height = props.get('height')
-                        
-                        if width and height:
-                            try:
-                                if int(width) >= min_width and int(height) >= min_height:
-                                    filtered_results.append(img)
-                                    if len(filtered_results) >= count:
-                                        break
-                            except:
-                                continue
-                        else:
-                            # If no size info, include it
-                            filtered_results.append(img)
-                            if len(filtered_results) >= count:
-                                break
-                    else:
-                        # If no properties, include it
-                        filtered_results.append(img)
-                        if len(filtered_results) >= count:
-                            break
-                
-                results = filtered_results
-                print(f"✅ Found {len(results)} images matching size requirements")
-            else:
-                print(f"✅ Found {len(results)} images")
-            
-            return results
+            return response.json().get('results', [])
             
+        except QuotaExceeded:
+            # Let callers report throttling instead of treating it as "no results"
+            raise
         except Exception as e:
             print(f"❌ Search failed: {e}")
             return []
     
-    def get_file_extension(self, url, content_type=None):
-        """Get appropriate file extension from URL or content type"""
-        # Try to get extension from URL
-        parsed_url = urlparse(url)
-        path = parsed_url.path
-        if path and '.' in path:
-            ext = path.split('.')[-1].lower()
-            if ext in ['jpg', 'jpeg', 'png', 'gif', 'webp']:
-                return f".{ext}"
-        
-        
-        if content_type:
-            if 'jpeg' in content_type or 'jpg' in content_type:
-                return '.jpg'
-            elif 'png' in content_type:
-                return '.png'
-            elif 'gif' in content_type:
-                return '.gif'
-            elif 'webp' in content_type:
-                return '.webp'
-        
-        # Default to jpg
-        return '.jpg'
+    def search_images(self, query, count=50, min_size=None):
+        """Search for images and return ImageResult records filtered by minimum size"""
+        # Request more results to account for filtering
+        request_count = count * 3 if min_size else count
+        
+        # Parse once into compact records so later stages don't re-walk the JSON
+        results = [ImageResult.from_api(img) for img in self.search_raw(query, request_count)]
+        results = filter_by_size(results, min_size, limit=count)
+        
+        if min_size:
+            print(f"✅ Found {len(results)} images matching size requirements")
+        else:
+            print(f"✅ Found {len(results)} images")
+        
+        return results
+    
+    def numbered_files(self, download_folder, folder_name):
+        """Yield (number, filename) for the query's numbered images in a folder"""
+        pattern = re.compile(rf"^{re.escape(folder_name)}_(\d+)\.\w+$")
+        for filename in sorted(os.listdir(download_folder)):
+            match = pattern.match(filename)
+            if match:
+                yield int(match.group(1)), filename
     
-    def download_images(self, query, count=50):
-        """Download images for a given query"""
+    def load_sync_index(self, download_folder, folder_name):
+        """Load a folder's sync index, building one from files already in the folder"""
+        index_path = os.path.join(download_folder, SYNC_INDEX_NAME)
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                index = json.load(f)
+            # Never reuse a number already on disk, whoever wrote the file
+            for number, _ in self.numbered_files(download_folder, folder_name):
+                index['next_number'] = max(index['next_number'], number + 1)
+            return index
+        
+        # First sync of an existing folder: hash what is there and keep numbering after it
+        index = {'urls': {}, 'hashes': {}, 'next_number': 1}
+        for number, filename in self.numbered_files(download_folder, folder_name):
+            with open(os.path.join(download_folder, filename), 'rb') as f:
+                index['hashes'][hashlib.sha256(f.read()).hexdigest()] = filename
+            index['next_number'] = max(index['next_number'], number + 1)
+        return index
+    
+    def save_sync_index(self, download_folder, index):
+        """Write a folder's sync index, replacing the old one atomically"""
+        index_path = os.path.join(download_folder, SYNC_INDEX_NAME)
+        with open(index_path + '.tmp', 'w') as f:
+            json.dump(index, f, indent=1)
+        os.replace(index_path + '.tmp', index_path)
+    
+    def sync_images(self, query, count=50):
+        """Fetch only images not already in the query's folder and append them
+
+        Returns a report dict with the folder and added/unchanged/failed counts.
+        """
+        folder_name = query.replace(' ', '_').replace('/', '_').replace('\\', '_')
+        download_folder = os.path.join(self.base_folder, folder_name)
+        report = {'folder': download_folder, 'added': 0, 'unchanged': 0, 'failed': 0}
+        
+        results = self.search_images(query, count)
+        if not results:
+            return report
+        
+        os.makedirs(download_folder, exist_ok=True)
+        index = self.load_sync_index(download_folder, folder_name)
+        
+        for i, img in enumerate(results, 1):
+            # Known source URLs are skipped without fetching anything
+            if (img.url and img.url in index['urls']) or (img.thumbnail_url and img.thumbnail_url in index['urls']):
+                report['unchanged'] += 1
+                continue
+            
+            try:
+                print(f"Checking image {i}/{len(results)}...")
+                img_data, file_ext, img_url = fetch_result_image(img)
+                content_hash = hashlib.sha256(img_data).hexdigest()
+                
+                # The same image can turn up again under a different URL
+                if content_hash in index['hashes']:
+                    index['urls'][img_url] = content_hash
+                    report['unchanged'] += 1
+                    continue
+                
+                # Append after the highest number used so existing files keep their names
+                filename = f"{folder_name}_{index['next_number']:02d}{file_ext}"
+                with open(os.path.join(download_folder, filename), 'wb') as f:
+                    f.write(img_data)
+                
+                index['next_number'] += 1
+                index['hashes'][content_hash] = filename
+                index['urls'][img_url] = content_hash
+                self.save_sync_index(download_folder, index)
+                print(f"✅ Added: {filename} ({len(img_data) / 1024:.1f} KB)")
+                report['added'] += 1
+                
+                # Small delay to be respectful to servers
+                time.sleep(0.5)
+                
+            except Exception as e:
+                print(f" Failed to download image {i}: {e}")
+                report['failed'] += 1
+        
+        self.save_sync_index(download_folder, index)
+        print(f"\n🔄 Sync of '{query}': {report['added']} added, {report['unchanged']} unchanged, "
+              f"{report['failed']} failed in {download_folder}")
+        return report
+    
+    def download_images(self, query, count=50, sync=False):
+        """Download images for a given query (sync=True only fetches new ones)"""
+        if sync:
+            return self.sync_images(query, count)['folder']
+        
         # Search for images
         results = self.search_images(query, count)
         if not results:
@@ -119,25 +175,19 @@ class BraveImageDownloader:
         os.makedirs(download_folder, exist_ok=True)
         print(f"📁 Created folder: {download_folder}")
         
+        # Numbering by position overwrites files, so a sync index no longer matches
+        # the folder; the next sync rebuilds it from the files on disk
+        index_path = os.path.join(download_folder, SYNC_INDEX_NAME)
+        if os.path.exists(index_path):
+            os.remove(index_path)
        
         downloaded = 0
         for i, img in enumerate(results, 1):
             try:
-                # Get image URL from the result
-                img_url = img.get('src')
-                if not img_url:
-                    print(f" No image URL found for result {i}")
-                    continue
-                
                 print(f"Downloading image {i}/{len(results)}...")
                 
-                # Download the image
-                img_response = requests.get(img_url, timeout=15, stream=True)
-                img_response.raise_for_status()
-                
-                # Get appropriate file extension
-                content_type = img_response.headers.get('content-type', '')
-                file_ext = self.get_file_extension(img_url, content_type)
+                # Download the image (or its thumbnail), validating its content by magic bytes
+                img_data, file_ext, img_url = fetch_result_image(img)
                 
                 # Create filename
                 filename = f"{folder_name}_{i:02d}{file_ext}"
@@ -145,8 +195,7 @@ class BraveImageDownloader:
                 
                 # Save the image
                 with open(filepath, 'wb') as f:
-                    for chunk in img_response.iter_content(chunk_size=8192):
-                        f.write(chunk)
+                    f.write(img_data)
                 
                 file_size = os.path.getsize(filepath) / 1024  # Size in KB
                 print(f"✅ Downloaded: {filename} ({file_size:.1f} KB)")
@@ -163,8 +212,8 @@ class BraveImageDownloader:
         return download_folder
 
 def main():
-    # Get API key from environment variable
-    API_KEY = os.getenv('BRAVE_API_KEY')
+    # Get API key(s) from environment variable, comma separated for a key pool
+    API_KEY = os.getenv('BRAVE_API_KEYS') or os.getenv('BRAVE_API_KEY')
     
     if not API_KEY:
         print("Error: BRAVE_API_KEY not found in environment variables.")
@@ -172,7 +221,14 @@ def main():
         return
     
     # Create downloader instance
-    downloader = BraveImageDownloader(API_KEY)
+    downloader = BraveImageDownloader([key.strip() for key in API_KEY.split(',') if key.strip()])
+    
+    # Scheduled mode: python brave_image_downloader.py --sync "query one" "query two"
+    if len(sys.argv) > 2 and sys.argv[1] == '--sync':
+        count = int(os.getenv('SYNC_COUNT', 50))
+        for query in sys.argv[2:]:
+            downloader.sync_images(query, count)
+        return
     
     # Interactive mode
     print("🖼️  Brave Image Downloader")
@@ -196,8 +252,10 @@ def main():
         except ValueError:
             count = 50
             
+        sync = input("Only add images not already downloaded? (y/n): ").strip().lower() in ['y', 'yes']
+            
         # Download images
-        folder = downloader.download_images(query, count)
+        folder = downloader.download_images(query, count, sync=sync)
         
         if folder:
             choice = input("\nOpen folder? (y/n): ").strip().lower()
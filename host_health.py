@@ -0,0 +1,132 @@
+"""
+Host Health Registry
+Tracks success rate and latency per image host and trips a circuit
+breaker for hosts that keep failing
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+# Consecutive failures before a host's circuit opens
+DEFAULT_FAILURE_THRESHOLD = 3
+# Seconds a tripped host is skipped before it gets another try
+DEFAULT_COOL_OFF = 300
+# Weight of the newest sample in the moving latency average
+LATENCY_SMOOTHING = 0.3
+# Latency assumed for hosts we have not fetched from yet
+DEFAULT_LATENCY = 1.0
+# Hosts remembered at most; the least recently used are forgotten first
+DEFAULT_MAX_HOSTS = 1000
+
+
+def get_host(url):
+    """Return the lower-cased host name of a URL"""
+    return (urlparse(url).hostname or '').lower()
+
+
+class HostStats:
+    """Success/failure counters and latency for a single host"""
+
+    def __init__(self):
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency = None
+        self.open_until = 0
+
+    @property
+    def success_rate(self):
+        """Smoothed success rate so a single result does not dominate"""
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+    def to_dict(self):
+        """Return the stats as a JSON-friendly dict"""
+        return {
+            'successes': self.successes,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+            'success_rate': round(self.success_rate, 3),
+            'latency': round(self.latency, 3) if self.latency is not None else None,
+            'circuit_open': self.open_until > time.time()
+        }
+
+
+class HostHealthRegistry:
+    """Thread-safe registry of host health shared across download jobs"""
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, cool_off=DEFAULT_COOL_OFF,
+                 max_hosts=DEFAULT_MAX_HOSTS):
+        self.failure_threshold = failure_threshold
+        self.cool_off = cool_off
+        self.max_hosts = max_hosts
+        self.hosts = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _stats(self, host):
+        if host in self.hosts:
+            self.hosts.move_to_end(host)
+        else:
+            self.hosts[host] = HostStats()
+            # Search results span countless hosts, so keep the registry bounded
+            while len(self.hosts) > self.max_hosts:
+                self.hosts.popitem(last=False)
+        return self.hosts[host]
+
+    def record_success(self, url, latency):
+        """Record a successful fetch and close the host's circuit"""
+        with self.lock:
+            stats = self._stats(get_host(url))
+            stats.successes += 1
+            stats.consecutive_failures = 0
+            stats.open_until = 0
+            self._update_latency(stats, latency)
+
+    def record_failure(self, url, latency=None):
+        """Record a failed fetch, opening the circuit after repeated failures"""
+        with self.lock:
+            stats = self._stats(get_host(url))
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            if latency is not None:
+                self._update_latency(stats, latency)
+            if stats.consecutive_failures >= self.failure_threshold:
+                stats.open_until = time.time() + self.cool_off
+
+    def _update_latency(self, stats, latency):
+        if stats.latency is None:
+            stats.latency = latency
+        else:
+            stats.latency += LATENCY_SMOOTHING * (latency - stats.latency)
+
+    def is_available(self, url):
+        """Check whether a host's circuit is closed (or its cool-off has expired)"""
+        with self.lock:
+            stats = self.hosts.get(get_host(url))
+            return stats is None or stats.open_until <= time.time()
+
+    def expected_cost(self, url):
+        """Expected seconds per successful fetch from a URL's host"""
+        with self.lock:
+            stats = self.hosts.get(get_host(url))
+            if stats is None:
+                return DEFAULT_LATENCY / 0.5
+            latency = stats.latency if stats.latency is not None else DEFAULT_LATENCY
+            return latency / stats.success_rate
+
+    def order_urls(self, items, get_url):
+        """Sort items so fast, reliable hosts come first and tripped hosts last"""
+        def sort_key(item):
+            url = get_url(item)
+            if not url:
+                return (True, 0)
+            return (not self.is_available(url), self.expected_cost(url))
+
+        # sorted() is stable, so equally healthy hosts keep their search rank
+        return sorted(items, key=sort_key)
+
+    def snapshot(self):
+        """Return per-host stats as a dict"""
+        with self.lock:
+            return {host: stats.to_dict() for host, stats in self.hosts.items()}
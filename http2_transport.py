@@ -0,0 +1,84 @@
+"""
+HTTP/2 Image Transport
+Optional fetch transport that multiplexes image downloads over one
+HTTP/2 connection per host (needs `pip install httpx[http2]`)
+"""
+
+import threading
+from urllib.parse import urlparse
+
+try:
+    import httpx
+    import h2  # noqa: F401 - httpx only speaks HTTP/2 when h2 is installed
+except ImportError:
+    httpx = None
+
+# Connections the shared client may hold across all hosts; requests beyond
+# it wait for a free slot, so size it for every job's concurrent fetches
+DEFAULT_MAX_CONNECTIONS = 20
+
+
+def http2_available():
+    """Check whether the optional HTTP/2 dependencies are installed"""
+    return httpx is not None
+
+
+class _ResponseAdapter:
+    """Gives an httpx response the requests-style interface read_image expects"""
+
+    def __init__(self, response):
+        self.headers = response.headers
+        self.response = response
+
+    def iter_content(self, chunk_size=8192):
+        return self.response.iter_bytes(chunk_size)
+
+
+class Http2Transport:
+    """Shared HTTP/2 client used by the fetch stage for hosts that negotiate h2
+
+    The protocol is chosen per host by ALPN during the TLS handshake. Hosts
+    that answer with HTTP/1.1 are remembered and sent back to `requests`,
+    which opens parallel connections instead.
+    """
+
+    def __init__(self, connect_timeout, read_timeout, headers=None, max_connections=DEFAULT_MAX_CONNECTIONS,
+                 verify=True):
+        if not http2_available():
+            raise RuntimeError("HTTP/2 transport needs the optional httpx[http2] package")
+        self.client = httpx.Client(
+            http2=True,
+            headers=headers,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            follow_redirects=True,
+            verify=verify
+        )
+        self.host_protocols = {}
+        self.lock = threading.Lock()
+
+    def handles(self, url):
+        """Check whether a URL should go over this transport"""
+        parsed = urlparse(url)
+        if parsed.scheme != 'https':
+            # ALPN needs TLS, plain http hosts always speak HTTP/1.1 here
+            return False
+        with self.lock:
+            return self.host_protocols.get(parsed.hostname) != 'HTTP/1.1'
+
+    def fetch(self, url, read_image, **read_kwargs):
+        """Stream a URL and hand the response to read_image"""
+        with self.client.stream('GET', url) as response:
+            with self.lock:
+                self.host_protocols[urlparse(url).hostname] = response.http_version
+            response.raise_for_status()
+            return read_image(_ResponseAdapter(response), **read_kwargs)
+
+    def snapshot(self):
+        """Return the protocol negotiated with each host"""
+        with self.lock:
+            return dict(self.host_protocols)
+
+    def close(self):
+        """Close all pooled connections"""
+        self.client.close()
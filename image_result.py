@@ -0,0 +1,63 @@
+"""
+Image Search Results
+Compact records for Brave image search results and the size filter
+that runs over them
+"""
+
+from urllib.parse import urlparse
+
+
+def _to_int(value):
+    """Convert a dimension to int, using 0 for missing or invalid values"""
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class ImageResult:
+    """A single image search result, parsed once from the API response"""
+
+    __slots__ = ('url', 'thumbnail_url', 'width', 'height', 'source_host', 'title')
+
+    def __init__(self, url=None, thumbnail_url=None, width=0, height=0, source_host='', title=''):
+        self.url = url
+        self.thumbnail_url = thumbnail_url
+        self.width = width
+        self.height = height
+        self.source_host = source_host
+        self.title = title
+
+    @classmethod
+    def from_api(cls, data):
+        """Build a result from one entry of Brave's image search `results` list"""
+        props = data.get('properties') if isinstance(data.get('properties'), dict) else {}
+        thumbnail = data.get('thumbnail') if isinstance(data.get('thumbnail'), dict) else {}
+        url = props.get('url') or None
+        source_host = data.get('source') or urlparse(data.get('url') or url or '').hostname or ''
+        return cls(
+            url=url,
+            thumbnail_url=thumbnail.get('src') or None,
+            width=_to_int(props.get('width')),
+            height=_to_int(props.get('height')),
+            source_host=source_host,
+            title=data.get('title') or ''
+        )
+
+    def to_dict(self):
+        """Return the result as a JSON-friendly dict"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"ImageResult({self.url or self.thumbnail_url!r}, {self.width}x{self.height})"
+
+
+def filter_by_size(results, min_size, limit=None):
+    """Keep results at least min_size=(width, height), plus those with unknown size"""
+    if not min_size:
+        return results[:limit]
+
+    min_width, min_height = min_size
+    return [result for result in results
+            if (result.width >= min_width and result.height >= min_height)
+            or not (result.width and result.height)][:limit]
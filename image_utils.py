@@ -0,0 +1,246 @@
+"""
+Image Fetch Utilities
+Streams image downloads and validates them by their magic bytes
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Leading byte signatures for the image formats we keep
+IMAGE_SIGNATURES = [
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+    (b'GIF87a', '.gif'),
+    (b'GIF89a', '.gif'),
+]
+
+# Number of leading bytes needed to recognise every supported format
+SNIFF_BYTES = 16
+
+# Default size caps (bytes) for a single image and for a whole job
+DEFAULT_MAX_IMAGE_BYTES = 15 * 1024 * 1024
+DEFAULT_MAX_JOB_BYTES = 250 * 1024 * 1024
+
+# Separate connect/read timeouts (seconds) so dead hosts fail fast
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10
+
+# Content types that are never images, rejected before reading the body
+NON_IMAGE_CONTENT_TYPES = ('text/', 'application/json', 'application/xml', 'application/javascript')
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+
+class ImageRejected(Exception):
+    """Raised when a response is not an acceptable image"""
+
+
+class ImageTooLarge(ImageRejected):
+    """Raised when an image exceeds the caller's size cap, which is no fault of its host"""
+
+
+class HostUnavailable(Exception):
+    """Raised when every host for a result is cooling off after failures"""
+
+
+class FetchCancelled(Exception):
+    """Raised when a fetch is abandoned before it finished"""
+
+
+class AnyEvent:
+    """Read-only view of several events that counts as set once any of them is"""
+
+    def __init__(self, *events):
+        self.events = [event for event in events if event is not None]
+
+    def is_set(self):
+        return any(event.is_set() for event in self.events)
+
+
+class FetchPolicy:
+    """Timeouts, fallback and hedging settings for fetching search results"""
+
+    def __init__(self, connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT,
+                 use_thumbnail_fallback=True, hedge_after=None, transport=None):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.use_thumbnail_fallback = use_thumbnail_fallback
+        # Seconds to wait before firing a second request; None disables hedging
+        self.hedge_after = hedge_after
+        # Optional multiplexing transport (see http2_transport.py); None uses requests
+        self.transport = transport
+
+    @property
+    def timeout(self):
+        """Timeout tuple in the form requests expects"""
+        return (self.connect_timeout, self.read_timeout)
+
+
+def sniff_image_type(data):
+    """Return the file extension for image bytes, or None if not a known image"""
+    for signature, ext in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return ext
+
+    # WebP and AVIF carry their marker after a container header
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return '.webp'
+    if data[4:8] == b'ftyp' and data[8:12] in (b'avif', b'avis'):
+        return '.avif'
+
+    return None
+
+
+def get_candidate_urls(img, use_thumbnail_fallback=True):
+    """Return the URLs to try for an ImageResult, original first then thumbnail"""
+    urls = [img.url] if img.url else []
+
+    if (use_thumbnail_fallback or not urls) and img.thumbnail_url and img.thumbnail_url not in urls:
+        urls.append(img.thumbnail_url)
+
+    return urls
+
+
+def read_image(response, max_bytes=DEFAULT_MAX_IMAGE_BYTES, chunk_size=8192, cancel_event=None):
+    """Read a streamed response, aborting as soon as it is not an image or too large"""
+    content_type = response.headers.get('content-type', '').lower()
+    if content_type.startswith(NON_IMAGE_CONTENT_TYPES):
+        raise ImageRejected(f"Not an image (content-type {content_type})")
+
+    content_length = response.headers.get('content-length')
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise ImageTooLarge(f"Image too large ({content_length} bytes)")
+
+    data = bytearray()
+    file_ext = None
+
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if cancel_event is not None and cancel_event.is_set():
+            raise FetchCancelled("Fetch cancelled")
+        if not chunk:
+            continue
+        data += chunk
+
+        if len(data) > max_bytes:
+            raise ImageTooLarge(f"Image exceeds {max_bytes} bytes")
+
+        if file_ext is None and len(data) >= SNIFF_BYTES:
+            file_ext = sniff_image_type(bytes(data[:SNIFF_BYTES]))
+            if file_ext is None:
+                raise ImageRejected("Response body is not a recognised image")
+
+    # Bodies shorter than SNIFF_BYTES are only checked once fully read
+    if file_ext is None:
+        file_ext = sniff_image_type(bytes(data))
+        if file_ext is None:
+            raise ImageRejected("Response body is not a recognised image")
+
+    return bytes(data), file_ext
+
+
+def fetch_image(url, headers=None, timeout=15, max_bytes=DEFAULT_MAX_IMAGE_BYTES, cancel_event=None,
+                transport=None):
+    """Download an image and return (content, file_extension)"""
+    if cancel_event is not None and cancel_event.is_set():
+        raise FetchCancelled("Fetch cancelled")
+    if transport is not None and transport.handles(url):
+        return transport.fetch(url, read_image, max_bytes=max_bytes, cancel_event=cancel_event)
+
+    # Imported here as requests is slow to import and only needed once jobs run
+    import requests
+
+    response = requests.get(url, timeout=timeout, stream=True, headers=headers or DEFAULT_HEADERS)
+    try:
+        response.raise_for_status()
+        return read_image(response, max_bytes, cancel_event=cancel_event)
+    finally:
+        # Closing drops the connection for aborted bodies instead of draining them
+        response.close()
+
+
+def fetch_result_image(img, policy=None, max_bytes=DEFAULT_MAX_IMAGE_BYTES, health=None, cancel_event=None):
+    """Fetch a search result's image and return (content, file_extension, url)
+
+    The original URL is tried first. If it fails, the thumbnail URL is tried
+    next; if it is merely slow and hedging is enabled, the next request is
+    started alongside it and whichever finishes first wins. When a
+    HostHealthRegistry is given, hosts with an open circuit are skipped and
+    every attempt is recorded against its host, except for cancellations and
+    size-cap rejections, which depend on the caller rather than the host. Setting cancel_event aborts
+    every request at its next chunk.
+    """
+    if cancel_event is not None and cancel_event.is_set():
+        raise FetchCancelled("Fetch cancelled")
+
+    policy = policy or FetchPolicy()
+    urls = get_candidate_urls(img, policy.use_thumbnail_fallback)
+    if not urls:
+        raise ImageRejected("No image URL in search result")
+
+    if health is not None:
+        urls = [url for url in urls if health.is_available(url)]
+        if not urls:
+            raise HostUnavailable("All hosts for this result are cooling off")
+
+    # With a single URL, a hedge is simply a second request to the same URL
+    if policy.hedge_after is not None and len(urls) == 1:
+        urls = urls * 2
+
+    # Set once a winner is found so losing requests stop too
+    finished_event = threading.Event()
+    stop_event = AnyEvent(finished_event, cancel_event)
+    executor = ThreadPoolExecutor(max_workers=len(urls))
+    pending = {}
+    last_error = None
+
+    def fetch_and_record(url):
+        started = time.time()
+        try:
+            result = fetch_image(url, timeout=policy.timeout, max_bytes=max_bytes,
+                                 cancel_event=stop_event, transport=policy.transport)
+        except (FetchCancelled, ImageTooLarge):
+            raise
+        except Exception:
+            if health is not None:
+                health.record_failure(url, time.time() - started)
+            raise
+        if health is not None:
+            health.record_success(url, time.time() - started)
+        return result
+
+    def start_next():
+        url = urls.pop(0)
+        pending[executor.submit(fetch_and_record, url)] = url
+
+    try:
+        start_next()
+        while pending:
+            hedge_timeout = policy.hedge_after if urls else None
+            done, _ = wait(pending, timeout=hedge_timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # Current request is slow, hedge with the next URL
+                start_next()
+                continue
+
+            for future in done:
+                url = pending.pop(future)
+                try:
+                    img_data, file_ext = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                return img_data, file_ext, url
+
+            # Everything in flight failed, fall back to the next URL
+            if urls and not pending:
+                start_next()
+
+        raise last_error
+    finally:
+        # Stop any losing request at its next chunk
+        finished_event.set()
+        executor.shutdown(wait=False)
@@ -0,0 +1,276 @@
+"""
+Job Store
+Keeps download job status, result items, artifacts and the job queue
+outside process memory so several server processes can share them
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+
+DEFAULT_STORE_DIR = os.path.join(tempfile.gettempdir(), 'udm_jobs')
+# Seconds without updates after which a claimed job is handed to another worker
+STALE_JOB_TIMEOUT = 300
+
+
+class JobStore(ABC):
+    """Interface for job stores
+
+    Status and queue operations must be safe across processes. Artifacts
+    (spilled images and the finished ZIP) live under artifact_root, which
+    every process serving the store needs to see, e.g. a shared volume.
+    A Redis-like backend implements the same methods on top of hashes,
+    lists and an atomic pop for claim_job.
+    """
+
+    def __init__(self, artifact_root):
+        self.artifact_root = artifact_root
+        os.makedirs(artifact_root, exist_ok=True)
+
+    @abstractmethod
+    def create_job(self, session_id, status):
+        """Store the initial status dict for a new job"""
+
+    @abstractmethod
+    def get_job(self, session_id):
+        """Return the job's status dict, or None if it does not exist"""
+
+    @abstractmethod
+    def update_job(self, session_id, **fields):
+        """Merge fields into the job's status"""
+
+    @abstractmethod
+    def update_job_unless(self, session_id, statuses, **fields):
+        """Atomically merge fields into the job's status unless its status is one of statuses
+
+        Returns the job's status dict as it was before, or None if it does not exist.
+        """
+
+    @abstractmethod
+    def touch_job(self, session_id):
+        """Record that a client is still watching the job, as the job's last_seen time
+
+        Unlike update_job this is not a worker heartbeat, so a job whose
+        worker died is still reclaimed while its client keeps polling.
+        """
+
+    @abstractmethod
+    def delete_job(self, session_id):
+        """Remove a job, its items, queue entry and artifacts"""
+
+    @abstractmethod
+    def discard_results(self, session_id):
+        """Remove a job's items and artifacts but keep its status"""
+
+    @abstractmethod
+    def add_item(self, session_id, item):
+        """Append a downloaded image entry to the job's results"""
+
+    @abstractmethod
+    def get_items(self, session_id, since=0):
+        """Return the job's result entries, skipping the first `since`"""
+
+    @abstractmethod
+    def enqueue(self, session_id, payload):
+        """Queue a job for any worker to pick up"""
+
+    @abstractmethod
+    def claim_job(self):
+        """Atomically take the next queued job, returning (session_id, payload) or None"""
+
+    @abstractmethod
+    def finish_job(self, session_id):
+        """Remove a job from the queue once its worker is done with it"""
+
+    @abstractmethod
+    def purge_jobs(self, idle_since):
+        """Delete jobs no worker holds that were last updated before idle_since, returning their ids"""
+
+    def artifact_dir(self, session_id):
+        """Return (and create) the directory holding a job's files"""
+        path = os.path.join(self.artifact_root, session_id)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def remove_artifacts(self, session_id):
+        """Delete a job's files"""
+        shutil.rmtree(os.path.join(self.artifact_root, session_id), ignore_errors=True)
+
+
+class SQLiteJobStore(JobStore):
+    """Job store backed by a SQLite database and the local filesystem"""
+
+    def __init__(self, db_path, artifact_root=None):
+        super().__init__(artifact_root or os.path.dirname(os.path.abspath(db_path)))
+        self.db_path = db_path
+        self.local = threading.local()
+
+        with self._transaction() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                session_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL, last_seen REAL)""")
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(jobs)")]
+            if 'last_seen' not in columns:
+                # Databases created before clients were tracked separately from workers
+                conn.execute("ALTER TABLE jobs ADD COLUMN last_seen REAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS items (
+                session_id TEXT NOT NULL, data TEXT NOT NULL)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS items_session ON items (session_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_updated ON jobs (updated_at)")
+            conn.execute("""CREATE TABLE IF NOT EXISTS queue (
+                session_id TEXT PRIMARY KEY, payload TEXT NOT NULL, state TEXT NOT NULL,
+                created_at REAL NOT NULL, claimed_at REAL)""")
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared between threads
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def create_job(self, session_id, status):
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("INSERT INTO jobs (session_id, data, updated_at, last_seen) VALUES (?, ?, ?, ?)",
+                         (session_id, json.dumps(status), now, now))
+
+    def get_job(self, session_id):
+        row = self._connection().execute(
+            "SELECT data, last_seen FROM jobs WHERE session_id = ?", (session_id,)).fetchone()
+        if not row:
+            return None
+        status = json.loads(row[0])
+        if row[1] is not None:
+            status['last_seen'] = row[1]
+        return status
+
+    def update_job(self, session_id, **fields):
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT data FROM jobs WHERE session_id = ?", (session_id,)).fetchone()
+            if not row:
+                return
+            data = json.loads(row[0])
+            data.update(fields)
+            conn.execute("UPDATE jobs SET data = ?, updated_at = ? WHERE session_id = ?",
+                         (json.dumps(data), now, session_id))
+            # Any update doubles as a heartbeat for the worker holding the job
+            conn.execute("UPDATE queue SET claimed_at = ? WHERE session_id = ? AND state = 'claimed'",
+                         (now, session_id))
+
+    def update_job_unless(self, session_id, statuses, **fields):
+        with self._transaction() as conn:
+            row = conn.execute("SELECT data FROM jobs WHERE session_id = ?", (session_id,)).fetchone()
+            if not row:
+                return None
+            data = json.loads(row[0])
+            if data.get('status') not in statuses:
+                conn.execute("UPDATE jobs SET data = ?, updated_at = ? WHERE session_id = ?",
+                             (json.dumps(dict(data, **fields)), time.time(), session_id))
+        return data
+
+    def touch_job(self, session_id):
+        # A single autocommit statement, no read-then-write transaction
+        self._connection().execute("UPDATE jobs SET last_seen = ? WHERE session_id = ?",
+                                   (time.time(), session_id))
+
+    def delete_job(self, session_id):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM jobs WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM items WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM queue WHERE session_id = ?", (session_id,))
+        self.remove_artifacts(session_id)
+
+    def discard_results(self, session_id):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM items WHERE session_id = ?", (session_id,))
+        self.remove_artifacts(session_id)
+
+    def add_item(self, session_id, item):
+        with self._transaction() as conn:
+            conn.execute("INSERT INTO items (session_id, data) VALUES (?, ?)",
+                         (session_id, json.dumps(item)))
+
+    def get_items(self, session_id, since=0):
+        rows = self._connection().execute(
+            "SELECT data FROM items WHERE session_id = ? ORDER BY rowid LIMIT -1 OFFSET ?",
+            (session_id, max(since, 0))).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def enqueue(self, session_id, payload):
+        with self._transaction() as conn:
+            conn.execute("INSERT INTO queue (session_id, payload, state, created_at) VALUES (?, ?, 'queued', ?)",
+                         (session_id, json.dumps(payload), time.time()))
+
+    def claim_job(self):
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                """SELECT session_id, payload, state FROM queue
+                   WHERE state = 'queued' OR (state = 'claimed' AND claimed_at < ?)
+                   ORDER BY created_at LIMIT 1""",
+                (now - STALE_JOB_TIMEOUT,)).fetchone()
+            if not row:
+                return None
+
+            session_id, payload, state = row
+            conn.execute("UPDATE queue SET state = 'claimed', claimed_at = ? WHERE session_id = ?",
+                         (now, session_id))
+            if state == 'claimed':
+                # The previous worker died mid-job, so start over from a clean slate
+                conn.execute("DELETE FROM items WHERE session_id = ?", (session_id,))
+
+        return session_id, json.loads(payload)
+
+    def finish_job(self, session_id):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM queue WHERE session_id = ?", (session_id,))
+
+    def purge_jobs(self, idle_since):
+        with self._transaction() as conn:
+            rows = conn.execute(
+                """SELECT session_id FROM jobs WHERE updated_at < ?
+                   AND session_id NOT IN (SELECT session_id FROM queue)""",
+                (idle_since,)).fetchall()
+            session_ids = [row[0] for row in rows]
+            for session_id in session_ids:
+                conn.execute("DELETE FROM jobs WHERE session_id = ?", (session_id,))
+                conn.execute("DELETE FROM items WHERE session_id = ?", (session_id,))
+        for session_id in session_ids:
+            self.remove_artifacts(session_id)
+        return session_ids
+
+
+class _Transaction:
+    """Context manager running a write transaction that takes the lock up front"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def create_job_store(url=None):
+    """Create a job store from a URL such as sqlite:////var/lib/udm/jobs.db"""
+    url = url or f"sqlite:///{os.path.join(DEFAULT_STORE_DIR, 'jobs.db')}"
+    if url.startswith('sqlite:///'):
+        db_path = url[len('sqlite:///'):]
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        return SQLiteJobStore(db_path, os.getenv('JOB_ARTIFACT_DIR'))
+    raise ValueError(f"Unsupported job store URL: {url}")
@@ -5,6 +5,13 @@ let statusInterval = null;
 document.addEventListener('DOMContentLoaded', function() {
     document.getElementById('downloadForm').addEventListener('submit', handleFormSubmit);
     
+    // Stop the server-side job if the user leaves while it is still running
+    window.addEventListener('pagehide', function() {
+        if (currentSessionId && statusInterval) {
+            fetch(`/download/${currentSessionId}`, { method: 'DELETE', keepalive: true });
+        }
+    });
+    
     // Input validation for image count
     document.getElementById('imageCount').addEventListener('input', function(e) {
         const value = parseInt(e.target.value);
@@ -107,6 +114,7 @@ function createProgressDisplay() {
         <div id="progressText" class="progress-text">Initializing...</div>
         <div class="progress-buttons">
             <button id="downloadZipBtn" onclick="downloadZip()" class="btn-success" style="display: none;">📥 Download ZIP</button>
+            <button id="cancelBtn" onclick="cancelDownload()" class="btn-danger">✖ Cancel</button>
             <button onclick="resetForm()" class="btn-secondary">🔄 New Download</button>
         </div>
     `;
@@ -124,8 +132,10 @@ async function startProgressMonitoring() {
             
             updateProgress(status);
             
-            if (status.status === 'completed' || status.status === 'failed') {
+            if (status.status === 'completed' || status.status === 'failed' || status.status === 'cancelled') {
                 clearInterval(statusInterval);
+                statusInterval = null;
+                document.getElementById('cancelBtn').style.display = 'none';
 
                 if (status.status === 'completed') {
                     document.getElementById('downloadZipBtn').style.display = 'inline-block';
@@ -185,6 +195,26 @@ async function downloadZip() {
     }
 }
 
+async function cancelDownload() {
+    if (!currentSessionId) return;
+
+    try {
+        const cancelButton = document.getElementById('cancelBtn');
+        cancelButton.disabled = true;
+        cancelButton.textContent = 'Cancelling...';
+
+        const response = await fetch(`/download/${currentSessionId}`, { method: 'DELETE' });
+        const result = await response.json();
+
+        if (!result.success) {
+            throw new Error(result.error || 'Could not cancel download');
+        }
+        // Progress monitoring picks up the final 'cancelled' status
+    } catch (error) {
+        showMessage(`Error: ${error.message}`, 'error');
+    }
+}
+
 async function openFolder() {
     if (!currentSessionId) return;
 
@@ -211,9 +241,11 @@ function resetForm() {
         progressDisplay.remove();
     }
     
-    // Clear status interval
+    // Clear status interval, cancelling a job that is still running
     if (statusInterval) {
         clearInterval(statusInterval);
+        statusInterval = null;
+        fetch(`/download/${currentSessionId}`, { method: 'DELETE' });
     }
     
     // Reset button
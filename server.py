@@ -9,69 +9,193 @@ from dotenv import load_dotenv
 import os
 import threading
 import time
-import requests
-import zipfile
-import io
+import sys
 import uuid
-from urllib.parse import urlparse
-from brave_image_downloader import BraveImageDownloader
+import mimetypes
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from image_utils import (fetch_result_image, FetchPolicy, ImageRejected, HostUnavailable,
+                         DEFAULT_MAX_IMAGE_BYTES, DEFAULT_MAX_JOB_BYTES, DEFAULT_CONNECT_TIMEOUT,
+                         DEFAULT_READ_TIMEOUT, DEFAULT_HEADERS)
+from host_health import HostHealthRegistry, DEFAULT_MAX_HOSTS
+from brave_api import DEFAULT_RATE_PER_SECOND, DEFAULT_MAX_WAIT
+from static_assets import StaticAssets, PAGE_NAMES, ASSET_NAMES, STATIC_URL_PATH
 
 # Load environment variables from .env file
 load_dotenv()
 
-app = Flask(__name__, static_folder='.', static_url_path='')
+# Frontend files are served from memory by the routes below (see static_assets.py)
+app = Flask(__name__, static_folder=None)
+# Let a fronting nginx/Apache send files itself via X-Sendfile
+app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
 CORS(app)
 
-# Initialize the downloader
-API_KEY = os.getenv('BRAVE_API_KEY')
-if not API_KEY:
-    raise ValueError("BRAVE_API_KEY not found in environment variables. Please create a .env file with your API key.")
-downloader = BraveImageDownloader(API_KEY)
-
-# Store download status for each session
-download_status = {}
-# Lock for thread-safe access to download_status
-status_lock = threading.Lock()
-
-def get_file_extension(url, content_type=None):
-    """Get appropriate file extension from URL or content type"""
-    # Try to get extension from URL
-    parsed_url = urlparse(url)
-    path = parsed_url.path
-    if path and '.' in path:
-        ext = path.split('.')[-1].lower()
-        if ext in ['jpg', 'jpeg', 'png', 'gif', 'webp']:
-            return f".{ext}"
-    
-    # Try to get extension from content type
-    if content_type:
-        if 'jpeg' in content_type or 'jpg' in content_type:
-            return '.jpg'
-        elif 'png' in content_type:
-            return '.png'
-        elif 'gif' in content_type:
-            return '.gif'
-        elif 'webp' in content_type:
-            return '.webp'
-        
-    
-    # Default to jpg
-    return '.jpg'
+# One or more comma separated API keys
+API_KEYS = [key.strip() for key in (os.getenv('BRAVE_API_KEYS') or os.getenv('BRAVE_API_KEY') or '').split(',')
+            if key.strip()]
+
+# Clients are created on first use (see get_downloader/get_job_store) so a
+# cold instance can start serving requests as soon as Flask is imported
+downloader = None
+job_store = None
+static_assets = None
+clients_lock = threading.Lock()
+
+# Size caps for downloaded images, overridable from the environment
+MAX_IMAGE_BYTES = int(os.getenv('MAX_IMAGE_BYTES', DEFAULT_MAX_IMAGE_BYTES))
+MAX_JOB_BYTES = int(os.getenv('MAX_JOB_BYTES', DEFAULT_MAX_JOB_BYTES))
+
+# Image fetch timeouts and hedging, overridable from the environment
+FETCH_POLICY = FetchPolicy(
+    connect_timeout=float(os.getenv('FETCH_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT)),
+    read_timeout=float(os.getenv('FETCH_READ_TIMEOUT', DEFAULT_READ_TIMEOUT)),
+    hedge_after=float(os.getenv('FETCH_HEDGE_AFTER')) if os.getenv('FETCH_HEDGE_AFTER') else None
+)
+# Images fetched in parallel per job
+FETCH_CONCURRENCY = max(int(os.getenv('FETCH_CONCURRENCY', 4)), 1)
+# Multiplex fetches over HTTP/2 where hosts support it (needs httpx[http2])
+FETCH_HTTP2 = os.getenv('FETCH_HTTP2', '').lower() in ('1', 'true', 'yes')
+# Connection pool size of the shared HTTP/2 client, by default enough for
+# every job worker's fetches plus their hedges
+FETCH_HTTP2_MAX_CONNECTIONS = int(os.getenv('FETCH_HTTP2_MAX_CONNECTIONS') or
+                                  max(int(os.getenv('JOB_WORKERS', 4)), 1) * FETCH_CONCURRENCY * 2)
+http2_checked = False
+
+# Health of image hosts, shared by all jobs so failing hosts are skipped
+host_health = HostHealthRegistry(
+    failure_threshold=int(os.getenv('HOST_FAILURE_THRESHOLD', 3)),
+    cool_off=float(os.getenv('HOST_COOL_OFF', 300)),
+    max_hosts=int(os.getenv('HOST_HEALTH_MAX_HOSTS', DEFAULT_MAX_HOSTS))
+)
+
+# Per-job artifact layout inside the store
+ARCHIVE_NAME = 'archive.zip'
+# Seconds browsers may cache a finished archive
+ARCHIVE_MAX_AGE = 86400
+IMAGE_DIR_NAME = 'images'
+
+# Job worker threads per server process (0 for web-only processes)
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))
+# Seconds between checks of the shared queue for jobs queued elsewhere
+JOB_POLL_INTERVAL = 0.5
+job_available = threading.Event()
+# Seconds between a running job's checks for cancellation
+CANCEL_CHECK_INTERVAL = 1.0
+# Seconds without a /status or /results poll before a job counts as abandoned (0 disables)
+JOB_ABANDON_TIMEOUT = float(os.getenv('JOB_ABANDON_TIMEOUT', 60))
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+# Seconds finished jobs, their results and ZIPs are kept before being deleted
+JOB_RETENTION = float(os.getenv('JOB_RETENTION', 86400))
+# Seconds between sweeps for expired jobs by each process's job workers
+JOB_SWEEP_INTERVAL = 600
+last_sweep = 0
+sweep_lock = threading.Lock()
+workers_started = False
+workers_lock = threading.Lock()
+
+def get_downloader():
+    """Return the Brave downloader, creating it on first use"""
+    global downloader
+    if downloader is None:
+        with clients_lock:
+            if downloader is None:
+                if not API_KEYS:
+                    raise ValueError("BRAVE_API_KEY not found in environment variables. Please create a .env file with your API key.")
+                from brave_image_downloader import BraveImageDownloader
+                from brave_api import BraveKeyPool
+                downloader = BraveImageDownloader(BraveKeyPool(
+                    API_KEYS,
+                    rate_per_second=float(os.getenv('BRAVE_RATE_LIMIT', DEFAULT_RATE_PER_SECOND)),
+                    max_wait=float(os.getenv('BRAVE_MAX_WAIT', DEFAULT_MAX_WAIT))
+                ))
+    return downloader
+
+def get_job_store():
+    """Return the shared job store (see job_store.py), creating it on first use"""
+    global job_store
+    if job_store is None:
+        with clients_lock:
+            if job_store is None:
+                from job_store import create_job_store
+                job_store = create_job_store(os.getenv('JOB_STORE'))
+    return job_store
+
+def get_fetch_policy():
+    """Return the fetch policy, attaching the HTTP/2 transport on first use if enabled"""
+    global http2_checked
+    if FETCH_HTTP2 and not http2_checked:
+        with clients_lock:
+            if not http2_checked:
+                from http2_transport import Http2Transport, http2_available
+                if http2_available():
+                    FETCH_POLICY.transport = Http2Transport(FETCH_POLICY.connect_timeout, FETCH_POLICY.read_timeout,
+                                                            headers=DEFAULT_HEADERS,
+                                                            max_connections=FETCH_HTTP2_MAX_CONNECTIONS)
+                else:
+                    print("❌ FETCH_HTTP2 is set but httpx[http2] is not installed, using HTTP/1.1")
+                http2_checked = True
+    return FETCH_POLICY
+
+def get_static_assets():
+    """Return the precompressed frontend files, loading them on first use"""
+    global static_assets
+    if static_assets is None:
+        with clients_lock:
+            if static_assets is None:
+                static_assets = StaticAssets(app.root_path)
+    return static_assets
+
+def serve_asset(filename):
+    """Serve a frontend file from memory, or 404 if it is not one"""
+    assets = get_static_assets()
+    asset, immutable = assets.lookup(filename)
+    if asset is None:
+        return jsonify({'error': 'Not found'}), 404
+    return assets.make_response(asset, request, app.response_class, immutable=immutable)
+
+def warm_up():
+    """Create clients ahead of the first request, logging instead of failing"""
+    try:
+        get_static_assets()
+        get_job_store()
+        get_downloader()
+    except Exception as e:
+        print(f"❌ Warm-up failed: {e}")
+
+@app.route('/ready')
+def ready():
+    """Readiness check: 200 once the API key and job store are usable"""
+    try:
+        get_job_store()
+        get_downloader()
+    except Exception as e:
+        return jsonify({'ready': False, 'error': str(e)}), 503
+    return jsonify({'ready': True})
 
 @app.route('/')
 def home():
     """Serve the main HTML page"""
-    return app.send_static_file('index.html')
+    return serve_asset('index.html')
 
 @app.route('/test')
 def test():
     """Serve the test HTML page"""
-    return app.send_static_file('test.html')
+    return serve_asset('test.html')
 
 @app.route('/web')
 def web():
     """Serve the web deployment version"""
-    return app.send_static_file('web.html')
+    return serve_asset('web.html')
+
+@app.route(f'{STATIC_URL_PATH}/<filename>')
+def static_asset(filename):
+    """Serve a content-hashed frontend asset"""
+    return serve_asset(filename)
+
+@app.route(f"/<any({', '.join(PAGE_NAMES + ASSET_NAMES)}):filename>")
+def plain_asset(filename):
+    """Serve frontend files under their original names for old links"""
+    return serve_asset(filename)
 
 @app.route('/debug-search', methods=['POST'])
 def debug_search():
@@ -80,7 +204,7 @@ def debug_search():
         data = request.get_json()
         query = data.get('query', 'test')
         
-        results = downloader.search_images(query, 1)
+        results = get_downloader().search_raw(query, 1)
         
         if results:
             # Return first result structure for debugging
@@ -106,110 +230,262 @@ def parse_min_size(min_size_str):
     except:
         return None
 
-def meets_size_requirement(img, min_size):
-    """Check if image meets minimum size requirement"""
-    if not min_size:
-        return True
-    
-    min_width, min_height = min_size
-    
-    # Try to get dimensions from properties
-    if 'properties' in img and isinstance(img['properties'], dict):
-        props = img['properties']
-        width = props.get('width')
-        height = props.get('height')
-        
-        if width and height:
-            try:
-                return int(width) >= min_width and int(height) >= min_height
-            except:
-                pass
-    
-    # If no dimensions available, allow it through
+def make_result_item(n, filename, img, img_url, size):
+    """Build the results API entry for a downloaded image"""
+    return {
+        'n': n,
+        'filename': filename,
+        'bytes': size,
+        'source_url': img_url,
+        'source_host': img.source_host,
+        'thumbnail': img.thumbnail_url,
+        'width': img.width or None,
+        'height': img.height or None,
+        'title': img.title
+    }
+
+def file_etag(path):
+    """Return a strong ETag for a file from a hash of its contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+def quota_summary():
+    """Return this process's remaining Brave quota, or None before its first search"""
+    if downloader is None:
+        return None
+    quota = downloader.key_pool.snapshot()
+    return {key: quota[key] for key in ('monthly_remaining', 'available_keys')}
+
+def cancel_reason(status):
+    """Return why a job should stop, or None if it should keep running"""
+    if status is None:
+        return 'Job was deleted'
+    if status.get('cancel_requested'):
+        return 'Download cancelled'
+    if JOB_ABANDON_TIMEOUT and time.time() - status.get('last_seen', time.time()) > JOB_ABANDON_TIMEOUT:
+        return 'Download cancelled because the client stopped checking on it'
+    return None
+
+def mark_cancelled(store, session_id, reason):
+    """Free a stopped job's files and record why it stopped"""
+    store.discard_results(session_id)
+    store.update_job(session_id, status='cancelled', message=reason)
+
+def set_worker_status(store, session_id, **fields):
+    """Write a worker's status change unless the job was cancelled meanwhile
+
+    The check and the write happen in one store transaction, so a cancel
+    arriving at the last moment is never overwritten. A cancelled or
+    deleted job has its files freed instead. Returns True if written.
+    """
+    previous = store.update_job_unless(session_id, ('cancelling',), **fields)
+    if previous is None or previous.get('status') == 'cancelling':
+        mark_cancelled(store, session_id, cancel_reason(previous))
+        return False
     return True
 
 def download_worker(session_id, query, count, min_size=None):
     """Background worker to download images and create ZIP"""
+    store = get_job_store()
+    cancel_event = threading.Event()
     try:
-        download_status[session_id]['status'] = 'searching'
-        download_status[session_id]['message'] = 'Searching for images...'
+        # The job may have been cancelled while it waited in the queue
+        reason = cancel_reason(store.get_job(session_id))
+        if reason:
+            mark_cancelled(store, session_id, reason)
+            return
+
+        if not set_worker_status(store, session_id, status='searching', message='Searching for images...'):
+            return
 
         # Search for images with size filter applied during search
-        results = downloader.search_images(query, count, min_size)
+        try:
+            results = get_downloader().search_images(query, count, min_size)
+        finally:
+            # Searches run in whichever process claimed the job, so /status reads quota from the job
+            store.update_job(session_id, quota=quota_summary())
+
+        reason = cancel_reason(store.get_job(session_id))
+        if reason:
+            mark_cancelled(store, session_id, reason)
+            return
 
         if not results:
-            with status_lock:
-                download_status[session_id]['status'] = 'failed'
-                download_status[session_id]['message'] = 'No images found for this query'
+            set_worker_status(store, session_id, status='failed', message='No images found for this query')
             return
 
-        with status_lock:
-            download_status[session_id]['status'] = 'downloading'
-            download_status[session_id]['total'] = len(results)
-            download_status[session_id]['downloaded'] = 0
-            download_status[session_id]['failed'] = 0
-            download_status[session_id]['message'] = f'Downloading {len(results)} images...'
-
-        # Create ZIP file in memory
-        zip_buffer = io.BytesIO()
-
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for i, img in enumerate(results, 1):
-                try:
-                    # Get image URL from Brave API response
-                    img_url = None
-
-                    if 'properties' in img and isinstance(img['properties'], dict):
-                        img_url = img['properties'].get('url')
-
-                    if not img_url and 'thumbnail' in img and isinstance(img['thumbnail'], dict):
-                        img_url = img['thumbnail'].get('src')
-
-                    if not img_url:
-                        download_status[session_id]['failed'] += 1
-                        continue
-
-                    # Download image with headers to avoid blocking
-                    headers = {
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                    }
-                    img_response = requests.get(img_url, timeout=15, stream=True, headers=headers)
-                    img_response.raise_for_status()
-
-                    # Get file extension
-                    content_type = img_response.headers.get('content-type', '')
-                    file_ext = get_file_extension(img_url, content_type)
-
-                    # Create filename
-                    safe_query = query.replace(' ', '_').replace('/', '_').replace('\\', '_')
-                    filename = f"{safe_query}_{i:02d}{file_ext}"
-
-                    # Add image to ZIP
-                    zip_file.writestr(filename, img_response.content)
-                    download_status[session_id]['downloaded'] += 1
-                    download_status[session_id]['progress'] = download_status[session_id]['downloaded']
-                    download_status[session_id]['message'] = f'Downloaded {download_status[session_id]["downloaded"]}/{download_status[session_id]["total"]} images'
-
-                except Exception as e:
-                    with status_lock:
-                        download_status[session_id]['failed'] += 1
-                    continue
+        # Fetch from fast, reliable hosts first
+        results = host_health.order_urls(results, lambda img: img.url or img.thumbnail_url)
+
+        counts = {'downloaded': 0, 'failed': 0, 'rejected': 0, 'skipped': 0, 'bytes': 0}
+        if not set_worker_status(store, session_id, status='downloading', total=len(results),
+                                 message=f'Downloading {len(results)} images...', **counts):
+            return
+
+        # Spill each image to the shared artifact store as it arrives so any
+        # server process can preview it before the job ends
+        job_dir = store.artifact_dir(session_id)
+        image_dir = os.path.join(job_dir, IMAGE_DIR_NAME)
+        os.makedirs(image_dir, exist_ok=True)
+
+        import zipfile
 
-        # Store the ZIP buffer
-        zip_buffer.seek(0)
-        download_status[session_id]['zip_buffer'] = zip_buffer
+        fetch_policy = get_fetch_policy()
         safe_query = query.replace(' ', '_').replace('/', '_').replace('\\', '_')
-        download_status[session_id]['zip_filename'] = f"{safe_query}_images.zip"
-        download_status[session_id]['status'] = 'completed'
-        download_status[session_id]['message'] = f'Successfully downloaded {download_status[session_id]["downloaded"]} images'
+        queued = iter(enumerate(results, 1))
+        pending = {}
+
+        def fetch_next():
+            # Keep the next result in flight unless the job's byte budget is used up
+            if cancel_event.is_set():
+                return
+            for i, img in queued:
+                remaining_bytes = MAX_JOB_BYTES - counts['bytes']
+                if remaining_bytes <= 0:
+                    counts['failed'] += 1
+                    continue
+                future = executor.submit(fetch_result_image, img, fetch_policy,
+                                         max_bytes=min(MAX_IMAGE_BYTES, remaining_bytes), health=host_health,
+                                         cancel_event=cancel_event)
+                pending[future] = (i, img)
+                return
+
+        # Write the ZIP next to the images, publishing it only once complete
+        zip_path = os.path.join(job_dir, ARCHIVE_NAME)
+        executor = ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY)
+        try:
+            with zipfile.ZipFile(zip_path + '.tmp', 'w', zipfile.ZIP_DEFLATED) as zip_file:
+                for _ in range(FETCH_CONCURRENCY):
+                    fetch_next()
+
+                last_check = time.time()
+                while pending:
+                    done, _ = wait(pending, timeout=CANCEL_CHECK_INTERVAL, return_when=FIRST_COMPLETED)
+
+                    # Stop if the job was cancelled here or elsewhere, or its client went away
+                    if time.time() - last_check >= CANCEL_CHECK_INTERVAL:
+                        last_check = time.time()
+                        reason = cancel_reason(store.get_job(session_id))
+                        if reason:
+                            # Aborts in-flight requests at their next chunk
+                            cancel_event.set()
+                            break
+
+                    for future in done:
+                        i, img = pending.pop(future)
+                        fetch_next()
+                        try:
+                            # Download and validate image content, falling back to the thumbnail
+                            img_data, file_ext, img_url = future.result()
+                            if counts['bytes'] + len(img_data) > MAX_JOB_BYTES:
+                                raise ImageRejected("Job byte budget exhausted")
+
+                            # Create filename
+                            filename = f"{safe_query}_{i:02d}{file_ext}"
+
+                            # Save image for the results API and add it to the ZIP
+                            with open(os.path.join(image_dir, filename), 'wb') as f:
+                                f.write(img_data)
+                            zip_file.writestr(filename, img_data)
+                            store.add_item(session_id, make_result_item(i, filename, img, img_url, len(img_data)))
+
+                            counts['bytes'] += len(img_data)
+                            counts['downloaded'] += 1
+                            store.update_job(session_id, progress=counts['downloaded'],
+                                             message=f'Downloaded {counts["downloaded"]}/{len(results)} images',
+                                             **counts)
+                            continue
+
+                        except HostUnavailable:
+                            counts['skipped'] += 1
+                        except ImageRejected:
+                            counts['rejected'] += 1
+                        except Exception:
+                            pass
+
+                        counts['failed'] += 1
+                        store.update_job(session_id, **counts)
+        finally:
+            # After a cancel, don't wait for fetches still stuck before their
+            # first byte; they are abandoned and end at their read timeout
+            executor.shutdown(wait=not cancel_event.is_set(), cancel_futures=True)
+
+        if cancel_event.is_set():
+            mark_cancelled(store, session_id, reason)
+            return
 
+        os.replace(zip_path + '.tmp', zip_path)
+        # A cancel that came in after the last check (or while hashing) wins over publishing
+        set_worker_status(store, session_id, status='completed', zip_filename=f"{safe_query}_images.zip",
+                          zip_etag=file_etag(zip_path), zip_bytes=os.path.getsize(zip_path),
+                          message=f'Successfully downloaded {counts["downloaded"]} images', **counts)
+
+    except Exception as e:
+        set_worker_status(store, session_id, status='failed', message=str(e))
+
+def sweep_expired_jobs():
+    """Delete jobs idle for longer than JOB_RETENTION, at most once per JOB_SWEEP_INTERVAL"""
+    global last_sweep
+    # Only one idle worker thread per process sweeps, the others keep polling
+    if time.time() - last_sweep < JOB_SWEEP_INTERVAL or not sweep_lock.acquire(blocking=False):
+        return
+    try:
+        last_sweep = time.time()
+        purged = get_job_store().purge_jobs(time.time() - JOB_RETENTION)
+        if purged:
+            print(f"🧹 Removed {len(purged)} expired jobs")
     except Exception as e:
-        download_status[session_id]['status'] = 'failed'
-        download_status[session_id]['message'] = str(e)
+        print(f"❌ Could not remove expired jobs: {e}")
+    finally:
+        sweep_lock.release()
+
+def job_worker_loop():
+    """Pull queued jobs from the shared store and run them"""
+    while True:
+        sweep_expired_jobs()
+        try:
+            job = get_job_store().claim_job()
+        except Exception as e:
+            print(f"❌ Could not claim job: {e}")
+            job = None
+
+        if not job:
+            # Jobs queued by this process wake us early, others are picked up by polling
+            job_available.wait(JOB_POLL_INTERVAL)
+            job_available.clear()
+            continue
+
+        session_id, payload = job
+        min_size = tuple(payload['min_size']) if payload['min_size'] else None
+        try:
+            download_worker(session_id, payload['query'], payload['count'], min_size)
+        finally:
+            get_job_store().finish_job(session_id)
+
+def start_job_workers(count=None):
+    """Start this process's job worker threads (only the first call has an effect)"""
+    global workers_started
+    with workers_lock:
+        if workers_started:
+            return
+        workers_started = True
+        for _ in range(JOB_WORKERS if count is None else count):
+            thread = threading.Thread(target=job_worker_loop)
+            thread.daemon = True
+            thread.start()
+
+@app.before_request
+def ensure_job_workers():
+    """Start job workers lazily so they run inside each forked server process"""
+    if JOB_WORKERS > 0:
+        start_job_workers()
 
 @app.route('/download', methods=['POST'])
 def start_download():
-    """Start background download and return session ID"""
+    """Queue a download job and return session ID"""
     try:
         data = request.get_json()
         query = data.get('query', '').strip()
@@ -228,7 +504,7 @@ def start_download():
 
         # Create session
         session_id = str(uuid.uuid4())
-        download_status[session_id] = {
+        get_job_store().create_job(session_id, {
             'status': 'starting',
             'message': 'Initializing download...',
             'query': query,
@@ -236,13 +512,15 @@ def start_download():
             'progress': 0,
             'total': 0,
             'downloaded': 0,
-            'failed': 0
-        }
+            'failed': 0,
+            'rejected': 0,
+            'skipped': 0,
+            'bytes': 0
+        })
 
-        # Start background download
-        thread = threading.Thread(target=download_worker, args=(session_id, query, count, min_size))
-        thread.daemon = True
-        thread.start()
+        # Hand the job to whichever worker claims it first
+        get_job_store().enqueue(session_id, {'query': query, 'count': count, 'min_size': min_size})
+        job_available.set()
 
         return jsonify({
             'success': True,
@@ -256,36 +534,111 @@ def start_download():
 @app.route('/status/<session_id>')
 def get_status(session_id):
     """Get download status for a session"""
-    if session_id not in download_status:
+    store = get_job_store()
+    # Polling keeps the job alive, see JOB_ABANDON_TIMEOUT
+    store.touch_job(session_id)
+    status = store.get_job(session_id)
+    if status is None:
         return jsonify({'error': 'Session not found'}), 404
 
-    # Create a copy of the status without the zip_buffer (not JSON serializable)
-    status = download_status[session_id].copy()
-    status.pop('zip_buffer', None)  # Remove the BytesIO object
-
+    status.setdefault('quota', None)
     return jsonify(status)
 
+@app.route('/results/<session_id>')
+def get_results(session_id):
+    """List images downloaded so far, optionally only those after ?since=<count>"""
+    store = get_job_store()
+    store.touch_job(session_id)
+    status = store.get_job(session_id)
+    if status is None:
+        return jsonify({'error': 'Session not found'}), 404
+
+    since = max(request.args.get('since', 0, type=int), 0)
+    items = [dict(item, url=f'/results/{session_id}/{item["n"]}')
+             for item in store.get_items(session_id, since)]
+    return jsonify({
+        'status': status['status'],
+        'total': status['total'],
+        'count': since + len(items),
+        'items': items
+    })
+
+@app.route('/results/<session_id>/<int:n>')
+def get_result_image(session_id, n):
+    """Stream a single downloaded image while the job is still running"""
+    store = get_job_store()
+    if store.get_job(session_id) is None:
+        return jsonify({'error': 'Session not found'}), 404
+
+    item = next((item for item in store.get_items(session_id) if item['n'] == n), None)
+    if not item:
+        return jsonify({'error': 'Image not available'}), 404
+
+    mimetype = mimetypes.guess_type(item['filename'])[0] or 'application/octet-stream'
+    image_path = os.path.join(store.artifact_dir(session_id), IMAGE_DIR_NAME, item['filename'])
+    return send_file(image_path, mimetype=mimetype, download_name=item['filename'], max_age=3600)
+
 @app.route('/download/<session_id>')
 def download_zip(session_id):
     """Download the ZIP file for a completed session"""
-    if session_id not in download_status:
+    store = get_job_store()
+    status = store.get_job(session_id)
+    if status is None:
         return jsonify({'error': 'Session not found'}), 404
 
-    status = download_status[session_id]
     if status['status'] != 'completed':
         return jsonify({'error': 'Download not completed yet'}), 400
 
-    if 'zip_buffer' not in status:
+    zip_path = os.path.join(store.artifact_dir(session_id), ARCHIVE_NAME)
+    if not os.path.exists(zip_path):
         return jsonify({'error': 'ZIP file not available'}), 500
 
-    # Return the ZIP file
-    status['zip_buffer'].seek(0)
-    return send_file(
-        status['zip_buffer'],
+    # Serve from disk so Range/If-Range resumes and If-None-Match 304s are
+    # handled, and the server can use sendfile (or X-Sendfile) for the body
+    response = send_file(
+        zip_path,
         mimetype='application/zip',
         as_attachment=True,
-        download_name=status['zip_filename']
+        download_name=status['zip_filename'],
+        etag=status.get('zip_etag', True),
+        max_age=ARCHIVE_MAX_AGE
     )
+    # A finished archive never changes, but it belongs to one user
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.immutable = True
+    return response
+
+@app.route('/download/<session_id>', methods=['DELETE'])
+def cancel_download(session_id):
+    """Cancel a job, stopping its worker and freeing its files"""
+    store = get_job_store()
+    # Flag a running job in one step so it cannot finish between the check and the write;
+    # whichever worker holds it notices within CANCEL_CHECK_INTERVAL
+    status = store.update_job_unless(session_id, FINISHED_STATUSES, cancel_requested=True,
+                                     status='cancelling', message='Cancelling download...')
+    if status is None:
+        return jsonify({'error': 'Session not found'}), 404
+
+    if status['status'] in FINISHED_STATUSES:
+        # Nothing is running any more, just free the finished job's files
+        mark_cancelled(store, session_id, 'Download deleted')
+
+    return jsonify({'success': True, 'message': 'Download cancelled'})
+
+@app.route('/hosts')
+def get_host_health():
+    """Get success rate, latency and circuit state for each image host"""
+    return jsonify(host_health.snapshot())
+
+@app.route('/quota')
+def get_quota():
+    """Get Brave API usage and remaining quota for each key"""
+    try:
+        key_pool = get_downloader().key_pool
+    except Exception as e:
+        return jsonify({'error': str(e)}), 503
+    return jsonify(key_pool.snapshot())
 
 @app.route('/open-folder/<session_id>')
 def open_folder(session_id):
@@ -297,10 +650,20 @@ def open_folder(session_id):
 
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'worker':
+        # Worker-only process: pull jobs from the shared store without serving HTTP
+        print(f"👷 Starting {JOB_WORKERS} job workers...")
+        start_job_workers(max(JOB_WORKERS, 1))
+        while True:
+            time.sleep(3600)
+
     print("🚀 Starting Ultimate Download Machine Server...")
     print("🌐 Web App: http://localhost:5000/web")
     print("📁 Images download directly to user's device as ZIP")
     print("🚀 Ready for web deployment!")
     print("=" * 60)
+
+    # Warm up clients in the background so the port opens immediately
+    threading.Thread(target=warm_up, daemon=True).start()
     port = int(os.getenv('PORT', 5000))
     app.run(debug=False, host='0.0.0.0', port=port)
\ No newline at end of file
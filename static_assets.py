@@ -0,0 +1,100 @@
+"""
+Static Asset Cache
+Loads the web frontend into memory once, precompresses it and serves it
+under content-hashed URLs with long-lived cache headers
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Files the web frontend needs; anything else in the repo root is not served
+PAGE_NAMES = ('index.html', 'test.html', 'web.html')
+ASSET_NAMES = ('script.js', 'style.css')
+
+# Hashed asset URLs never change content, so browsers may keep them for a year
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Pages and unhashed URLs are revalidated with their ETag on every load
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+STATIC_URL_PATH = '/static'
+
+
+class StaticAsset:
+    """One file held in memory with its precompressed variants"""
+
+    def __init__(self, name, data):
+        self.name = name
+        self.content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        self.digest = hashlib.sha256(data).hexdigest()[:12]
+        base, ext = os.path.splitext(name)
+        self.hashed_name = f"{base}.{self.digest}{ext}"
+
+        # Only keep encodings that actually save bytes
+        self.encodings = {'identity': data}
+        gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(gzipped) < len(data):
+            self.encodings['gzip'] = gzipped
+        if brotli is not None:
+            compressed = brotli.compress(data, quality=11)
+            if len(compressed) < len(data):
+                self.encodings['br'] = compressed
+
+    def choose_encoding(self, accept_encodings):
+        """Pick the smallest encoding the client accepts"""
+        for encoding in ('br', 'gzip'):
+            if encoding in self.encodings and accept_encodings[encoding]:
+                return encoding
+        return 'identity'
+
+
+class StaticAssets:
+    """In-memory store of the frontend's pages and assets"""
+
+    def __init__(self, root):
+        self.assets = {}
+        self.by_hashed_name = {}
+
+        for name in ASSET_NAMES:
+            with open(os.path.join(root, name), 'rb') as f:
+                asset = StaticAsset(name, f.read())
+            self.assets[name] = asset
+            self.by_hashed_name[asset.hashed_name] = asset
+
+        # Point pages at the hashed asset URLs so they can be cached forever
+        for name in PAGE_NAMES:
+            with open(os.path.join(root, name), 'rb') as f:
+                html = f.read().decode('utf-8')
+            for asset in self.by_hashed_name.values():
+                html = html.replace(f'"{asset.name}"', f'"{self.url_for(asset.name)}"')
+            self.assets[name] = StaticAsset(name, html.encode('utf-8'))
+
+    def url_for(self, name):
+        """Return the content-hashed URL of an asset"""
+        return f"{STATIC_URL_PATH}/{self.assets[name].hashed_name}"
+
+    def lookup(self, filename):
+        """Find an asset by hashed name (immutable) or plain name (revalidated)"""
+        if filename in self.by_hashed_name:
+            return self.by_hashed_name[filename], True
+        if filename in self.assets:
+            return self.assets[filename], False
+        return None, False
+
+    def make_response(self, asset, request, response_class, immutable=False):
+        """Build a response for an asset, negotiating encoding and honouring If-None-Match"""
+        encoding = asset.choose_encoding(request.accept_encodings)
+        response = response_class(asset.encodings[encoding], mimetype=asset.content_type)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+        # Each encoding is a different byte sequence, so it needs its own strong ETag
+        response.set_etag(f"{asset.digest}-{encoding}")
+        return response.make_conditional(request)